@@ -1,63 +1,224 @@
 import os
-import json
 import hmac
-import hashlib
+import binascii
 import logging
 import sys
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, unquote_to_bytes
+import orjson
+from cachetools import TTLCache
 from flask import Flask, request, jsonify
 from github_client import GithubClient
-from reputation import calculate_reputation, format_reputation_line
+from reputation import (
+    calculate_reputation,
+    format_reputation_line,
+    MERGED_PR_POINTS,
+    CLOSED_PR_POINTS,
+    ISSUE_POINTS,
+    CORE_THUMBS_UP_POINTS,
+    CORE_THUMBS_DOWN_POINTS,
+)
 
-# Configure logging
+# Configure logging; an unknown LOG_LEVEL falls back to INFO rather than failing startup
+LOG_LEVEL = (os.environ.get('LOG_LEVEL') or 'INFO').upper()
+LOG_LEVEL_VALID = LOG_LEVEL in logging.getLevelNamesMapping()
 logging.basicConfig(
-    level=logging.INFO,
+    level=LOG_LEVEL if LOG_LEVEL_VALID else logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(sys.stdout)
     ]
 )
 logger = logging.getLogger(__name__)
+if not LOG_LEVEL_VALID:
+    logger.warning("Unknown LOG_LEVEL %r, using INFO", LOG_LEVEL)
 
 app = Flask(__name__)
 
 GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN')
+GITHUB_READ_TOKENS = [t.strip() for t in os.environ.get('GITHUB_READ_TOKENS', '').split(',') if t.strip()]
 WEBHOOK_SECRET = os.environ.get('GITHUB_WEBHOOK_SECRET')
-CORE_TEAM_MEMBERS = os.environ.get('CORE_TEAM_MEMBERS', '').split(',')
+WEBHOOK_SECRET_BYTES = WEBHOOK_SECRET.encode() if WEBHOOK_SECRET else None
+CORE_TEAM_MEMBERS = frozenset(m.strip() for m in os.environ.get('CORE_TEAM_MEMBERS', '').split(',') if m.strip())
 REPUTATION_THRESHOLD = int(os.environ.get('REPUTATION_THRESHOLD', '-80'))
+REPUTATION_CACHE_TTL = int(os.environ.get('REPUTATION_CACHE_TTL', '300'))
+BOT_COMMENT_CACHE_TTL = 60
+REPUTATION_ROW_MAX_AGE = int(os.environ.get('REPUTATION_ROW_MAX_AGE', '1800'))
+WEBHOOK_WORKERS = int(os.environ.get('WEBHOOK_WORKERS', '4'))
+WEBHOOK_QUEUE_SIZE = int(os.environ.get('WEBHOOK_QUEUE_SIZE', '500'))
 REPO_NAME = 'archestra-ai/archestra'
 
-logger.info(f"Starting Reputation Bot")
-logger.info(f"GITHUB_TOKEN: {'Set' if GITHUB_TOKEN else 'Not set'}")
-logger.info(f"WEBHOOK_SECRET: {'Set' if WEBHOOK_SECRET else 'Not set'}")
-logger.info(f"CORE_TEAM_MEMBERS: {CORE_TEAM_MEMBERS}")
-logger.info(f"REPUTATION_THRESHOLD: {REPUTATION_THRESHOLD}")
-logger.info(f"REPO_NAME: {REPO_NAME}")
+logger.info("Starting Reputation Bot")
+logger.info("GITHUB_TOKEN: %s", 'Set' if GITHUB_TOKEN else 'Not set')
+logger.info("GITHUB_READ_TOKENS: %s set", len(GITHUB_READ_TOKENS))
+logger.info("WEBHOOK_SECRET: %s", 'Set' if WEBHOOK_SECRET else 'Not set')
+logger.debug("CORE_TEAM_MEMBERS: %s", sorted(CORE_TEAM_MEMBERS))
+logger.info("REPUTATION_THRESHOLD: %s", REPUTATION_THRESHOLD)
+logger.info("REPUTATION_CACHE_TTL: %s", REPUTATION_CACHE_TTL)
+logger.info("WEBHOOK_WORKERS: %s", WEBHOOK_WORKERS)
+logger.info("WEBHOOK_QUEUE_SIZE: %s", WEBHOOK_QUEUE_SIZE)
+logger.info("REPO_NAME: %s", REPO_NAME)
+
+github_client = GithubClient(GITHUB_TOKEN, GITHUB_READ_TOKENS)
+
+SCORE_EXPLANATION = "_How is the score calculated? Read about it in the [Reputation Bot](https://github.com/archestra-ai/reputation-bot) repository_"
+REPUTATION_SUMMARY_HEADER = (
+    "## 📊 Reputation Summary\n\n"
+    "| User | Rep | Pull Requests | Activity | Assigned | Core Reactions |\n"
+    "|------|-----|---------------|----------|----------|----------------|\n"
+)
+REPUTATION_SUMMARY_FOOTER = f"\n---\n{SCORE_EXPLANATION} 🤖"
+# Hidden from readers; lets later updates tell how old each reused row is
+ROW_FETCHED_AT_TEMPLATE = "\n<!-- fetched: {entries} -->\n"
+# PR counts, issue count and assigned count link to the matching GitHub searches
+REPO_URL = f"https://github.com/{REPO_NAME}"
+PARTICIPANT_ROW_TEMPLATE = (
+    "| **{username}** | ⚡ {score} | "
+    "[{merged}✅](" + REPO_URL + "/pulls?q=is%3Apr%20author%3A{username}%20is%3Amerged) "
+    "[{open}🔄](" + REPO_URL + "/pulls?q=is%3Apr%20author%3A{username}%20is%3Aopen) "
+    "[{closed}❌](" + REPO_URL + "/pulls?q=is%3Apr%20author%3A{username}%20is%3Aclosed%20is%3Aunmerged) | "
+    "[{issues} issues](" + REPO_URL + "/issues?q=is%3Aissue%20author%3A{username}), {comments} comments | "
+    "[{assigned}](" + REPO_URL + "/issues?q=is%3Aissue%20state%3Aopen%20assignee%3A{username}) | "
+    "{core} |"
+)
+
+# Reputation data keyed by (repo, username, core team); comment bursts on one
+# issue re-request the same users within seconds of each other
+reputation_cache = TTLCache(maxsize=1024, ttl=REPUTATION_CACHE_TTL)
+reputation_cache_lock = threading.Lock()
+
+def get_cached_user_reputation(repo_name, username, core_team):
+    key = (repo_name, username, core_team)
+    with reputation_cache_lock:
+        cached = reputation_cache.get(key)
+    if cached is not None:
+        logger.info("Using cached reputation for @%s", username)
+        return cached
+    
+    reputation_data = github_client.get_user_reputation(repo_name, username, core_team)
+    with reputation_cache_lock:
+        reputation_cache[key] = reputation_data
+    return reputation_data
 
-github_client = GithubClient(GITHUB_TOKEN)
+def invalidate_user_reputation(repo_name, username, core_team):
+    with reputation_cache_lock:
+        reputation_cache.pop((repo_name, username, core_team), None)
+
+def get_cached_users_reputation(repo_name, usernames, core_team):
+    results = {}
+    with reputation_cache_lock:
+        for username in usernames:
+            cached = reputation_cache.get((repo_name, username, core_team))
+            if cached is not None:
+                results[username] = cached
+    if results:
+        logger.info("Using cached reputation for %s", sorted(results))
+    
+    # Everyone not cached is fetched in one batched request
+    missing = [username for username in usernames if username not in results]
+    if missing:
+        fetched = github_client.get_users_reputation_bulk(repo_name, missing, core_team)
+        with reputation_cache_lock:
+            for username, reputation_data in fetched.items():
+                reputation_cache[(repo_name, username, core_team)] = reputation_data
+        results.update(fetched)
+    return results
+
+# Runs independent GitHub lookups side by side within one webhook's processing
+lookup_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='github-lookup')
+
+# Last known bot comment per issue, refreshed whenever we post or edit it, so a
+# burst of comment webhooks on one issue shares a single comment-list scan
+bot_comment_cache = TTLCache(maxsize=256, ttl=BOT_COMMENT_CACHE_TTL)
+bot_comment_lock = threading.Lock()
+
+def find_cached_bot_comment(repo_name, issue_number):
+    key = (repo_name, issue_number)
+    with bot_comment_lock:
+        cached = bot_comment_cache.get(key)
+    if cached is not None:
+        logger.info("Using cached bot comment %s for issue #%s", cached['id'], issue_number)
+        return cached
+    
+    existing_comment = github_client.find_bot_comment(repo_name, issue_number)
+    if existing_comment:
+        with bot_comment_lock:
+            bot_comment_cache[key] = existing_comment
+    return existing_comment
 
 def verify_webhook_signature(payload, signature):
     if not WEBHOOK_SECRET:
         logger.warning("No webhook secret configured, skipping signature verification")
         return True
     
-    expected_signature = 'sha256=' + hmac.new(
-        WEBHOOK_SECRET.encode(),
-        payload,
-        hashlib.sha256
-    ).hexdigest()
-    
-    is_valid = hmac.compare_digest(expected_signature, signature)
+    if not signature.startswith('sha256='):
+        logger.info("Received signature without sha256= prefix: %s...", signature[:20])
+        return False
+    try:
+        signature_digest = binascii.unhexlify(signature[7:])
+    except ValueError:
+        logger.info("Received signature is not valid hex: %s...", signature[:20])
+        return False
+    
+    # Compare raw 32-byte digests; hmac.digest() takes the OpenSSL one-shot path
+    # instead of building an HMAC object
+    mac = hmac.digest(WEBHOOK_SECRET_BYTES, payload, 'sha256')
+    is_valid = hmac.compare_digest(mac, signature_digest)
     if not is_valid:
-        logger.info(f"Expected signature: {expected_signature[:20]}...")
-        logger.info(f"Received signature: {signature[:20]}...")
-    logger.info(f"Webhook signature verification: {'Valid' if is_valid else 'Invalid'}")
+        logger.info("Expected signature: sha256=%s...", mac.hex()[:13])
+        logger.info("Received signature: %s...", signature[:20])
+    logger.info("Webhook signature verification: %s", 'Valid' if is_valid else 'Invalid')
     return is_valid
 
+def parse_json_payload(raw_data):
+    # orjson reads the raw bytes, no decode step needed
+    try:
+        payload = orjson.loads(raw_data)
+    except orjson.JSONDecodeError as e:
+        logger.error("Failed to parse JSON payload: %s", e)
+        return None
+    logger.info("Successfully parsed JSON webhook payload")
+    return payload
+
+def parse_form_payload(raw_data):
+    # GitHub sometimes sends form-encoded webhooks, always as a single payload=<json> field
+    try:
+        if raw_data.startswith(b'payload=') and b'&' not in raw_data:
+            payload_bytes = unquote_to_bytes(raw_data[8:].replace(b'+', b' '))
+        else:
+            form_data = dict(parse_qsl(raw_data.decode('utf-8')))
+            if 'payload' not in form_data:
+                logger.error("No 'payload' field in form data")
+                return None
+            payload_bytes = form_data['payload']
+        payload = orjson.loads(payload_bytes)
+    except (UnicodeDecodeError, orjson.JSONDecodeError) as e:
+        logger.error("Failed to parse form-encoded payload: %s", e)
+        return None
+    logger.info("Successfully parsed form-encoded webhook payload")
+    return payload
+
+def parse_unknown_payload(raw_data):
+    # No usable Content-Type: try JSON, then form-encoded
+    payload = parse_json_payload(raw_data)
+    if payload is None:
+        logger.info("Retrying payload as form-encoded data")
+        payload = parse_form_payload(raw_data)
+    return payload
+
+PAYLOAD_PARSERS = {
+    'application/json': parse_json_payload,
+    'application/x-www-form-urlencoded': parse_form_payload,
+}
+
 @app.route('/webhook', methods=['POST'])
 def webhook():
     logger.info("Received webhook request")
     signature = request.headers.get('X-Hub-Signature-256', '')
-    logger.info(f"Signature present: {bool(signature)}")
+    logger.info("Signature present: %s", bool(signature))
     
     # Get raw data for signature verification
     raw_data = request.get_data()
@@ -75,273 +236,325 @@ def webhook():
     
     # Parse payload (can be JSON or form-encoded)
     if not raw_data:
-        logger.warning(f"Empty payload for event: {event}")
+        logger.warning("Empty payload for event: %s", event)
         return jsonify({'status': 'ok'}), 200
     
-    payload = None
     content_type = request.headers.get('Content-Type', '').lower()
+    mime_type = content_type.split(';', 1)[0].strip()
+    parser = PAYLOAD_PARSERS.get(mime_type, parse_unknown_payload)
+    payload = parser(raw_data)
+    if payload is None:
+        logger.error("Raw data: %s", raw_data[:200])
+        return jsonify({'error': 'Invalid payload format'}), 400
+    
+    logger.info("GitHub Event: %s", event)
+    logger.info("Payload action: %s", payload.get('action'))
+    
+    if event not in EVENT_HANDLERS:
+        logger.info("Ignoring event type: %s", event)
+        return jsonify({'status': 'ok'}), 200
     
-    # Try to parse based on content type
-    if 'application/x-www-form-urlencoded' in content_type:
-        # GitHub sometimes sends form-encoded webhooks
-        try:
-            from urllib.parse import parse_qs
-            form_data = parse_qs(raw_data.decode('utf-8'))
-            if 'payload' in form_data:
-                import json as json_module
-                payload = json_module.loads(form_data['payload'][0])
-                logger.info("Successfully parsed form-encoded webhook payload")
-        except Exception as e:
-            logger.error(f"Failed to parse form-encoded payload: {e}")
-            logger.error(f"Raw data: {raw_data[:200]}")
-            return jsonify({'error': 'Invalid form data'}), 400
-    else:
-        # Try to parse as JSON
-        try:
-            import json as json_module
-            payload = json_module.loads(raw_data)
-            logger.info("Successfully parsed JSON webhook payload")
-        except json_module.JSONDecodeError as e:
-            # Fallback: try form-encoded even without correct content-type
-            try:
-                from urllib.parse import parse_qs
-                form_data = parse_qs(raw_data.decode('utf-8'))
-                if 'payload' in form_data:
-                    payload = json_module.loads(form_data['payload'][0])
-                    logger.info("Successfully parsed form-encoded webhook payload (fallback)")
-                else:
-                    raise ValueError("No 'payload' field in form data")
-            except Exception as e2:
-                logger.error(f"Failed to parse JSON payload: {e}")
-                logger.error(f"Failed to parse as form data: {e2}")
-                logger.error(f"Raw data: {raw_data[:200]}")
-                return jsonify({'error': 'Invalid payload format'}), 400
-    
-    logger.info(f"GitHub Event: {event}")
-    logger.info(f"Payload action: {payload.get('action') if payload else 'No payload'}")
-    
+    # Reputation lookups take several GitHub round-trips; acknowledge now so the
+    # delivery doesn't hit GitHub's 10s timeout while we're still working
     try:
-        if event == 'pull_request':
-            logger.info("Handling pull request event")
-            handle_pull_request(payload)
-        elif event == 'issues':
-            logger.info("Handling issue event")
-            handle_issue(payload)
-        elif event == 'issue_comment':
-            logger.info("Handling issue comment event")
-            handle_issue_comment(payload)
-        else:
-            logger.info(f"Ignoring event type: {event}")
-    except Exception as e:
-        logger.error(f"Error processing webhook: {str(e)}", exc_info=True)
-        return jsonify({'error': str(e)}), 500
-    
-    logger.info("Webhook processed successfully")
-    return jsonify({'status': 'ok'}), 200
+        event_queue.put_nowait((event, payload))
+    except queue.Full:
+        # Back-pressure: GitHub marks the delivery failed, and it can be redelivered later
+        logger.warning("Webhook queue is full (%s pending), rejecting %s event", event_queue.qsize(), event)
+        return jsonify({'error': 'Too many pending events'}), 503
+    logger.info("Webhook queued for processing (%s pending)", event_queue.qsize())
+    return jsonify({'status': 'queued'}), 202
 
 def handle_pull_request(payload):
     action = payload.get('action')
-    logger.info(f"PR action: {action}")
+    logger.info("PR action: %s", action)
     if action not in ['opened', 'reopened']:
-        logger.info(f"Ignoring PR action: {action}")
+        logger.info("Ignoring PR action: %s", action)
         return
     
     pr = payload.get('pull_request', {})
     pr_number = pr.get('number')
     author = pr.get('user', {}).get('login')
     
-    logger.info(f"PR #{pr_number} by @{author}")
+    logger.info("PR #%s by @%s", pr_number, author)
     
     if not author or not pr_number:
-        logger.error(f"Missing PR data: author={author}, pr_number={pr_number}")
+        logger.error("Missing PR data: author=%s, pr_number=%s", author, pr_number)
         return
     
-    logger.info(f"Fetching reputation for @{author}")
-    reputation_data = github_client.get_user_reputation(REPO_NAME, author, CORE_TEAM_MEMBERS)
+    # Opening a PR changes the author's counts, and the close decision should use fresh data
+    invalidate_user_reputation(REPO_NAME, author, CORE_TEAM_MEMBERS)
+    logger.info("Fetching reputation for @%s", author)
+    reputation_data = get_cached_user_reputation(REPO_NAME, author, CORE_TEAM_MEMBERS)
     reputation_score = calculate_reputation(reputation_data)
-    reputation_line = format_reputation_line(reputation_score, reputation_data)
     
-    logger.info(f"Reputation calculated: {reputation_score} points")
+    logger.info("Reputation calculated: %s points", reputation_score)
     
     # Check if reputation is below threshold
     if reputation_score < REPUTATION_THRESHOLD:
-        logger.warning(f"User @{author} has reputation {reputation_score}, below threshold of {REPUTATION_THRESHOLD}")
-        
-        # Define point values (same as in reputation.py)
-        merged_points = 20
-        open_points = 3
-        closed_points = -10
-        issue_points = 5
-        thumbs_up_points = 15
-        thumbs_down_points = -50
+        logger.warning("User @%s has reputation %s, below threshold of %s", author, reputation_score, REPUTATION_THRESHOLD)
         
         # Post explanation comment
         close_comment = f"""## ⚠️ Pull Request Auto-Closed
     
-{reputation_line}
+{format_reputation_line(reputation_score, reputation_data)}
 
 This pull request has been automatically closed because the author's reputation score ({reputation_score}) is below the minimum threshold of {REPUTATION_THRESHOLD}.
 
 To improve your reputation:
-- Create quality pull requests that get merged (+{merged_points} points each)
-- Open issues that contribute to the project (+{issue_points} points each)
-- Avoid having PRs closed without merging ({closed_points} points each)
-- Earn positive reactions from core team members (+{thumbs_up_points} points each)
-- Avoid negative reactions from core team members ({thumbs_down_points} points each)
+- Create quality pull requests that get merged (+{MERGED_PR_POINTS} points each)
+- Open issues that contribute to the project (+{ISSUE_POINTS} points each)
+- Avoid having PRs closed without merging ({CLOSED_PR_POINTS} points each)
+- Earn positive reactions from core team members (+{CORE_THUMBS_UP_POINTS} points each)
+- Avoid negative reactions from core team members ({CORE_THUMBS_DOWN_POINTS} points each)
 
 Please work on improving your contribution quality and reputation before submitting new pull requests.
 
-_How is the score calculated? Read about it in the [Reputation Bot](https://github.com/archestra-ai/reputation-bot) repository_"""
+{SCORE_EXPLANATION}"""
         
-        logger.info(f"Posting auto-close comment to PR #{pr_number}")
+        logger.info("Posting auto-close comment to PR #%s", pr_number)
         github_client.post_comment(REPO_NAME, pr_number, close_comment)
-        logger.info(f"Attempting to close PR #{pr_number}")
+        logger.info("Attempting to close PR #%s", pr_number)
         if github_client.close_pull_request(REPO_NAME, pr_number):
-            logger.info(f"PR #{pr_number} auto-closed successfully due to low reputation")
+            logger.info("PR #%s auto-closed successfully due to low reputation", pr_number)
         else:
-            logger.warning(f"Failed to close PR #{pr_number}, but comment was posted")
+            logger.warning("Failed to close PR #%s, but comment was posted", pr_number)
         return
     
     # Normal flow - post reputation comment
-    comment_body = f"{reputation_line}\n\n_How is the score calculated? Read about it in the [Reputation Bot](https://github.com/archestra-ai/reputation-bot) repository_"
-    logger.info(f"Posting comment to PR #{pr_number}")
+    comment_body = f"{format_reputation_line(reputation_score, reputation_data)}\n\n{SCORE_EXPLANATION}"
+    logger.info("Posting comment to PR #%s", pr_number)
     github_client.post_comment(REPO_NAME, pr_number, comment_body)
-    logger.info(f"Comment posted successfully to PR #{pr_number}")
+    logger.info("Comment posted successfully to PR #%s", pr_number)
 
 def handle_issue(payload):
     action = payload.get('action')
-    logger.info(f"Issue action: {action}")
+    logger.info("Issue action: %s", action)
     if action not in ['opened', 'reopened']:
-        logger.info(f"Ignoring issue action: {action}")
+        logger.info("Ignoring issue action: %s", action)
         return
     
     issue = payload.get('issue', {})
     issue_number = issue.get('number')
     author = issue.get('user', {}).get('login')
     
-    logger.info(f"Issue #{issue_number} by @{author}")
+    logger.info("Issue #%s by @%s", issue_number, author)
     
     if not author or not issue_number:
-        logger.error(f"Missing issue data: author={author}, issue_number={issue_number}")
+        logger.error("Missing issue data: author=%s, issue_number=%s", author, issue_number)
         return
     
-    post_or_update_issue_reputation(issue_number)
+    # The author's issue count just changed
+    invalidate_user_reputation(REPO_NAME, author, CORE_TEAM_MEMBERS)
+    update_issue_reputation(issue_number)
 
 def handle_issue_comment(payload):
     action = payload.get('action')
-    logger.info(f"Issue comment action: {action}")
+    logger.info("Issue comment action: %s", action)
     if action != 'created':
-        logger.info(f"Ignoring comment action: {action}")
+        logger.info("Ignoring comment action: %s", action)
         return
     
     issue = payload.get('issue', {})
     issue_number = issue.get('number')
     comment_author = payload.get('comment', {}).get('user', {}).get('login')
     
-    logger.info(f"Comment on issue #{issue_number} by @{comment_author}")
+    logger.info("Comment on issue #%s by @%s", issue_number, comment_author)
     
     if not issue_number:
-        logger.error(f"Missing issue number")
+        logger.error("Missing issue number")
         return
     
-    post_or_update_issue_reputation(issue_number)
+    update_issue_reputation(issue_number)
+
+def format_participant_row(username, reputation_score, reputation_data):
+    """Format one participant's row of the reputation summary table."""
+    thumbs_up = reputation_data['core_thumbs_up']
+    thumbs_down = reputation_data['core_thumbs_down']
+    core_parts = []
+    if thumbs_up > 0:
+        core_parts.append(f"+{thumbs_up}👍")
+    if thumbs_down > 0:
+        core_parts.append(f"-{thumbs_down}👎")
+    
+    return PARTICIPANT_ROW_TEMPLATE.format(
+        username=username,
+        score=reputation_score,
+        merged=reputation_data['merged_prs'],
+        open=reputation_data['open_prs'],
+        closed=reputation_data['closed_prs'],
+        issues=reputation_data['issues'],
+        comments=reputation_data['comments'],
+        assigned=reputation_data.get('assigned_issues', 0),
+        core=" ".join(core_parts) or "—"
+    )
+
+# Issues with an update running; the flag is set when another event for the same
+# issue arrives meanwhile, so the running worker makes one more pass afterwards
+issue_updates_in_flight = {}
+issue_updates_lock = threading.Lock()
+
+def update_issue_reputation(issue_number):
+    with issue_updates_lock:
+        if issue_number in issue_updates_in_flight:
+            logger.info("Update already running for issue #%s, coalescing this event into it", issue_number)
+            issue_updates_in_flight[issue_number] = True
+            return
+        issue_updates_in_flight[issue_number] = False
+    
+    while True:
+        error = None
+        try:
+            post_or_update_issue_reputation(issue_number)
+        except Exception as e:
+            error = e
+        with issue_updates_lock:
+            if not issue_updates_in_flight[issue_number]:
+                del issue_updates_in_flight[issue_number]
+                if error is not None:
+                    raise error
+                return
+            issue_updates_in_flight[issue_number] = False
+        # Events coalesced into this run were already acknowledged to GitHub and won't be
+        # redelivered, so they still get their pass even if this one failed
+        if error is not None:
+            logger.warning("Update for issue #%s failed (%s), running again for events that arrived meanwhile", issue_number, error)
+        else:
+            logger.info("More events arrived for issue #%s during the update, running again", issue_number)
 
 def post_or_update_issue_reputation(issue_number):
-    logger.info(f"Getting participants for issue #{issue_number}")
-    participants = github_client.get_issue_participants(REPO_NAME, issue_number)
+    # The participant list and the bot comment lookup are independent round-trips
+    logger.info("Getting participants and existing bot comment for issue #%s", issue_number)
+    existing_comment_future = lookup_executor.submit(find_cached_bot_comment, REPO_NAME, issue_number)
+    # Frozen once so the subset check and set differences below are all hash-based
+    participants = frozenset(github_client.get_issue_participants(REPO_NAME, issue_number))
     
     if not participants:
-        logger.warning(f"No participants found for issue #{issue_number}")
+        logger.warning("No participants found for issue #%s", issue_number)
         return
     
-    logger.info(f"Found {len(participants)} participants: {participants}")
+    logger.info("Found %s participants: %s", len(participants), participants)
     
     # Check if there's an existing comment with all participants
-    existing_comment = github_client.find_bot_comment(REPO_NAME, issue_number)
+    existing_rows = {}
+    stale_rows = {}
+    existing_comment = existing_comment_future.result()
     if existing_comment:
-        existing_usernames = github_client.extract_usernames_from_comment(existing_comment['body'])
-        logger.info(f"Existing comment has users: {existing_usernames}")
+        existing_rows = github_client.extract_rows_from_comment(existing_comment['body'])
+        existing_usernames = frozenset(existing_rows)
+        logger.info("Existing comment has users: %s", existing_usernames)
         
         # Check if all current participants are already in the existing comment
         if participants.issubset(existing_usernames):
-            logger.info(f"All participants {participants} are already in the existing comment. Skipping update.")
+            logger.info("All participants %s are already in the existing comment. Skipping update.", participants)
             return
         else:
             new_participants = participants - existing_usernames
-            logger.info(f"New participants detected: {new_participants}. Updating comment.")
+            logger.info("New participants detected: %s. Updating comment.", new_participants)
+        
+        # Rows fetched recently are reused as-is; new participants and stale rows get fetched.
+        # Ages come from each row's own fetch time, since every write touches the comment
+        now = time.time()
+        stale_rows = {username: row for username, row in existing_rows.items()
+                      if now - row['fetched_at'] > REPUTATION_ROW_MAX_AGE}
+        if stale_rows:
+            logger.info("Rows older than %ss, refreshing: %s", REPUTATION_ROW_MAX_AGE, list(stale_rows))
+            for username in stale_rows:
+                del existing_rows[username]
     
-    # Collect all participant data first
     participant_data = []
-    for username in participants:
-        logger.info(f"Fetching reputation for @{username}")
-        reputation_data = github_client.get_user_reputation(REPO_NAME, username, CORE_TEAM_MEMBERS)
+    for username in participants & existing_rows.keys():
+        logger.info("Reusing existing row for @%s", username)
+        participant_data.append(existing_rows[username])
+    
+    # Fetch the remaining participants
+    requested = participants - existing_rows.keys()
+    reputations = get_cached_users_reputation(REPO_NAME, requested, CORE_TEAM_MEMBERS)
+    if not reputations:
+        # Every lookup failed; rewriting would only repeat or shrink the summary
+        logger.warning("No reputation data fetched for issue #%s, leaving the comment for the next event", issue_number)
+        return
+    # Users whose lookup failed keep their previous row if they had one; new ones are
+    # left out, and since they're missing from the comment the next event retries them
+    failed = requested - reputations.keys()
+    if failed:
+        logger.warning("Reputation lookup failed for %s on issue #%s", sorted(failed), issue_number)
+        for username in failed & stale_rows.keys():
+            participant_data.append(stale_rows[username])
+    fetched_at = int(time.time())
+    for username, reputation_data in reputations.items():
         reputation_score = calculate_reputation(reputation_data)
         participant_data.append({
             'username': username,
             'score': reputation_score,
-            'data': reputation_data
+            'row': format_participant_row(username, reputation_score, reputation_data),
+            'fetched_at': fetched_at
         })
-        logger.info(f"@{username}: {reputation_score} points")
+        logger.info("@%s: %s points", username, reputation_score)
     
     # Sort by reputation score (highest first)
     participant_data.sort(key=lambda x: x['score'], reverse=True)
     
-    comment_body = "## 📊 Reputation Summary\n\n"
-    comment_body += "| User | Rep | Pull Requests | Activity | Assigned | Core Reactions |\n"
-    comment_body += "|------|-----|---------------|----------|----------|----------------|\n"
-    
+    # Collect the pieces and join once; += on str recopies the whole body per row
+    parts = [REPUTATION_SUMMARY_HEADER]
     for participant in participant_data:
-        reputation_data = participant['data']
-        reputation_score = participant['score']
-        username = participant['username']
-        
-        # Format PR counts as clickable links
-        merged_link = f"[{reputation_data['merged_prs']}✅](https://github.com/archestra-ai/archestra/pulls?q=is%3Apr%20author%3A{username}%20is%3Amerged)"
-        open_link = f"[{reputation_data['open_prs']}🔄](https://github.com/archestra-ai/archestra/pulls?q=is%3Apr%20author%3A{username}%20is%3Aopen)"
-        closed_link = f"[{reputation_data['closed_prs']}❌](https://github.com/archestra-ai/archestra/pulls?q=is%3Apr%20author%3A{username}%20is%3Aclosed%20is%3Aunmerged)"
-        pr_str = f"{merged_link} {open_link} {closed_link}"
-        # Format activity with clickable issue count
-        issues_link = f"[{reputation_data['issues']} issues](https://github.com/archestra-ai/archestra/issues?q=is%3Aissue%20author%3A{username})"
-        activity_str = f"{issues_link}, {reputation_data['comments']} comments"
-        
-        # Format assigned issues as a clickable link
-        assigned_count = reputation_data.get('assigned_issues', 0)
-        assigned_link = f"[{assigned_count}](https://github.com/archestra-ai/archestra/issues?q=is%3Aissue%20state%3Aopen%20assignee%3A{username})"
-        
-        core_str = ""
-        if reputation_data['core_thumbs_up'] > 0:
-            core_str += f"+{reputation_data['core_thumbs_up']}👍"
-        if reputation_data['core_thumbs_down'] > 0:
-            if core_str:
-                core_str += " "
-            core_str += f"-{reputation_data['core_thumbs_down']}👎"
-        if not core_str:
-            core_str = "—"
-        
-        comment_body += f"| **{username}** | ⚡ {reputation_score} | {pr_str} | {activity_str} | {assigned_link} | {core_str} |\n"
-    
-    comment_body += "\n---\n"
-    comment_body += "_How is the score calculated? Read about it in the [Reputation Bot](https://github.com/archestra-ai/reputation-bot) repository_ 🤖"
-    
-    # Check for existing comment RIGHT BEFORE posting to avoid race conditions
-    logger.info(f"Checking for existing bot comment on issue #{issue_number} (final check)")
-    existing_comment = github_client.find_bot_comment(REPO_NAME, issue_number)
-    
-    if existing_comment:
-        logger.info(f"Found existing comment {existing_comment['id']}, updating it")
-        github_client.update_comment(REPO_NAME, existing_comment['id'], comment_body)
-    else:
-        # Double-check one more time to handle race conditions
-        logger.info(f"No existing comment found, checking once more before posting")
-        existing_comment = github_client.find_bot_comment(REPO_NAME, issue_number)
+        parts.append(participant['row'] + "\n")
+    parts.append(ROW_FETCHED_AT_TEMPLATE.format(entries=" ".join(
+        f"{participant['username']}={participant['fetched_at']}" for participant in participant_data
+    )))
+    parts.append(REPUTATION_SUMMARY_FOOTER)
+    comment_body = "".join(parts)
+    
+    # Updates for one issue never overlap (see update_issue_reputation), so the lock only
+    # guards the shared cache; the GitHub write happens outside it so other issues'
+    # writes and lookups don't queue behind this one (or behind a Retry-After wait)
+    key = (REPO_NAME, issue_number)
+    with bot_comment_lock:
+        existing_comment = bot_comment_cache.get(key) or existing_comment
+    try:
         if existing_comment:
-            logger.info(f"Found existing comment on second check {existing_comment['id']}, updating it")
+            logger.info("Found existing comment %s, updating it", existing_comment['id'])
             github_client.update_comment(REPO_NAME, existing_comment['id'], comment_body)
+            comment_id = existing_comment['id']
         else:
-            logger.info(f"Posting new comment to issue #{issue_number}")
-            github_client.post_comment(REPO_NAME, issue_number, comment_body)
-    
-    logger.info(f"Issue #{issue_number} reputation updated successfully")
+            logger.info("Posting new comment to issue #%s", issue_number)
+            comment_id = github_client.post_comment(REPO_NAME, issue_number, comment_body)
+    except Exception:
+        # The cached comment may have been deleted; rescan on the next event
+        with bot_comment_lock:
+            bot_comment_cache.pop(key, None)
+        raise
+    with bot_comment_lock:
+        bot_comment_cache[key] = {
+            'id': comment_id,
+            'body': comment_body
+        }
+    
+    logger.info("Issue #%s reputation updated successfully", issue_number)
+
+EVENT_HANDLERS = {
+    'pull_request': handle_pull_request,
+    'issues': handle_issue,
+    'issue_comment': handle_issue_comment,
+}
+
+# Bounded so a burst of deliveries can't pile up unbounded work behind a slow GitHub API
+event_queue = queue.Queue(maxsize=WEBHOOK_QUEUE_SIZE)
+
+def process_events():
+    while True:
+        event, payload = event_queue.get()
+        logger.info("Handling %s event (action: %s)", event, payload.get('action'))
+        try:
+            EVENT_HANDLERS[event](payload)
+            logger.info("Webhook %s processed successfully", event)
+        except Exception as e:
+            logger.error("Error processing webhook: %s", e, exc_info=True)
+        finally:
+            event_queue.task_done()
+
+for worker_index in range(WEBHOOK_WORKERS):
+    threading.Thread(target=process_events, name=f"webhook-worker-{worker_index}", daemon=True).start()
 
 @app.route('/health', methods=['GET'])
 def health():
@@ -349,6 +562,7 @@ def health():
     return jsonify({'status': 'healthy'}), 200
 
 if __name__ == '__main__':
+    # Werkzeug dev server for local runs only; the container serves the app with gunicorn
     port = int(os.environ.get('PORT', 8080))
-    logger.info(f"Starting Flask app on port {port}")
+    logger.info("Starting Flask app on port %s", port)
     app.run(host='0.0.0.0', port=port)
\ No newline at end of file
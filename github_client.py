@@ -1,335 +1,483 @@
+import re
+import time
+import itertools
+import threading
 import requests
 import logging
+import orjson
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from cachetools import LRUCache
 from github import Github
-from typing import List, Dict, Optional, Set
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Any, Collection, Dict, FrozenSet, Iterable, List, Optional, Set
 
 logger = logging.getLogger(__name__)
 
+API_URL = 'https://api.github.com'
+GRAPHQL_URL = f'{API_URL}/graphql'
+BOT_LOGIN_TTL = 24 * 60 * 60
+# Stop routing reads to a token once its remaining quota for a resource drops below this
+RATE_LIMIT_RESERVE = 100
+
+# Users per reputation query; each user adds six searches, so keep queries well under GraphQL's limits
+REPUTATION_BATCH_SIZE = 20
+
+# Aliased searches that make up one user's reputation in the GraphQL query
+REPUTATION_SEARCHES = ('merged', 'open', 'closed', 'issues', 'assigned', 'commented')
+
+# Selection for items in a search result: who opened it and who gave it a 👍 or 👎.
+# Filtering by content keeps other reactions from crowding these out of the first 100
+REACTION_FIELDS = (
+    'author { login } '
+    'thumbsUp: reactions(first: 100, content: THUMBS_UP) { nodes { user { login } } } '
+    'thumbsDown: reactions(first: 100, content: THUMBS_DOWN) { nodes { user { login } } }'
+)
+
+# Client-side throttling so a burst of webhooks doesn't trip GitHub's secondary rate limits
+MAX_REQUESTS_PER_SECOND = 30
+MAX_CONCURRENT_REQUESTS = 10
+# How many times to wait out a secondary rate limit before giving up, and the longest wait
+SECONDARY_RATE_LIMIT_RETRIES = 2
+MAX_RETRY_AFTER = 60
+
+def parse_retry_after(value: str) -> float:
+    """Seconds to wait for a Retry-After header, given as delta-seconds or an HTTP-date."""
+    try:
+        seconds = float(int(value))
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            # Unparseable (or a date without a timezone): wait the longest we're willing to
+            return MAX_RETRY_AFTER
+    return min(max(seconds, 0), MAX_RETRY_AFTER)
+
+# Any of the signatures the bot has put in its comments, matched in one scan of the body
+BOT_SIGNATURE_PATTERN = re.compile(r'Generated by \[?Reputation Bot\]?|📊 Reputation Summary')
+
+# Rows of the reputation summary table: | **username** | ⚡ score | ...
+SUMMARY_ROW_PATTERN = re.compile(r'^\| \*\*@?([a-zA-Z0-9][\w-]*)\*\* \| ⚡ (-?\d+) \|.*$', re.MULTILINE)
+# Hidden marker below the table with when each row was fetched: <!-- fetched: user=epoch ... -->
+ROW_FETCHED_AT_PATTERN = re.compile(r'<!-- fetched: ([^>]*?) -->')
+ROW_FETCHED_AT_ENTRY_PATTERN = re.compile(r'([a-zA-Z0-9][\w-]*)=(\d+)')
+
+class RequestThrottle:
+    """Token bucket on requests per second plus a cap on requests in flight, shared by all threads."""
+    
+    def __init__(self, rate: float, max_concurrent: int):
+        self.rate = rate
+        self._tokens = float(rate)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._in_flight = threading.BoundedSemaphore(max_concurrent)
+    
+    def _take_token(self):
+        """Block until the bucket has a token to spend."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+    
+    def __enter__(self):
+        self._in_flight.acquire()
+        self._take_token()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._in_flight.release()
+
 class GithubClient:
-    def __init__(self, token: str):
+    def __init__(self, token: str, read_tokens: Optional[List[str]] = None):
         self.token = token
-        self.github = Github(token)
+        # Webhook worker threads share this client, so size the connection pool to match
+        self.github = Github(token, pool_size=16)
         self.headers = {
             'Authorization': f'token {token}',
             'Accept': 'application/vnd.github.v3+json'
         }
-        logger.info(f"GitHub client initialized with token: {'***' + token[-4:] if token else 'None'}")
-    
-    def get_user_reputation(self, repo_name: str, username: str, core_team: List[str]) -> Dict:
-        """Get reputation data for a user in a specific repository."""
-        logger.info(f"Getting reputation for user @{username} in {repo_name}")
-        logger.info(f"Core team members: {core_team}")
-        
+        # Comment writes, PR closes and GraphQL queries share one keep-alive session
+        # instead of paying a TLS handshake (or PyGithub's object lookups) per call
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        self.session.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry))
+        # (ETag, parsed body) of previous GETs; a 304 revalidation doesn't count against the rate limit
+        self._etag_cache = LRUCache(maxsize=1024)
+        self._etag_lock = threading.Lock()
+        # The bot's own login rarely changes; avoid refetching it per call
+        self._bot_login = None
+        self._bot_login_fetched_at = 0.0
+        # Reads rotate across all tokens to spread rate-limit usage; writes always use the
+        # bot's own token so comments and PR closes come from the bot account
+        self._read_tokens = [token] + [t for t in (read_tokens or []) if t and t != token]
+        self._read_token_cycle = itertools.cycle(self._read_tokens)
+        self._rate_limits = {}
+        self._rate_limit_lock = threading.Lock()
+        # (repo, issue number) -> ID of the comment the bot posted there, so finding it again
+        # is one GET instead of a scan through the issue's comments
+        self._bot_comment_ids = LRUCache(maxsize=4096)
+        self._bot_comment_lock = threading.Lock()
+        self._throttle = RequestThrottle(MAX_REQUESTS_PER_SECOND, MAX_CONCURRENT_REQUESTS)
+        logger.info("GitHub client initialized with token: %s", '***' + token[-4:] if token else 'None')
+        logger.info("Rotating reads across %s token(s)", len(self._read_tokens))
+        # Look up our own login now rather than on the first webhook; get_bot_username
+        # retries on first use if GitHub can't be reached yet
         try:
-            repo = self.github.get_repo(repo_name)
+            self.get_bot_username()
         except Exception as e:
-            logger.error(f"Failed to get repo {repo_name}: {str(e)}")
-            raise
+            logger.warning("Could not fetch bot username at startup: %s", e)
+    
+    def _pick_read_token(self, resource: str) -> str:
+        """Pick the next token in rotation that still has quota left for a rate-limit resource."""
+        with self._rate_limit_lock:
+            now = time.time()
+            fallback = None
+            for _ in range(len(self._read_tokens)):
+                token = next(self._read_token_cycle)
+                remaining, reset_at = self._rate_limits.get((token, resource), (None, 0))
+                if remaining is None or remaining > RATE_LIMIT_RESERVE or reset_at <= now:
+                    return token
+                if fallback is None or remaining > fallback[0]:
+                    fallback = (remaining, token)
+            logger.warning("All tokens are low on %s rate limit, using the one with most left (%s)", resource, fallback[0])
+            return fallback[1]
+    
+    def _record_rate_limit(self, token: str, response: requests.Response):
+        """Remember a token's remaining quota from the response's rate-limit headers."""
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        if remaining is None:
+            return
+        resource = response.headers.get('X-RateLimit-Resource', 'core')
+        reset_at = int(response.headers.get('X-RateLimit-Reset', 0))
+        with self._rate_limit_lock:
+            self._rate_limits[(token, resource)] = (int(remaining), reset_at)
+    
+    def _request(self, method: str, url: str, token: Optional[str] = None, **kwargs) -> requests.Response:
+        """Send a throttled request, waiting out secondary rate limits as GitHub asks via Retry-After."""
+        if token:
+            kwargs['headers'] = {**kwargs.get('headers', {}), 'Authorization': f'token {token}'}
+        for attempt in range(SECONDARY_RATE_LIMIT_RETRIES + 1):
+            with self._throttle:
+                response = self.session.request(method, url, **kwargs)
+            self._record_rate_limit(token or self.token, response)
+            retry_after = response.headers.get('Retry-After')
+            if response.status_code not in (403, 429) or retry_after is None or attempt == SECONDARY_RATE_LIMIT_RETRIES:
+                return response
+            wait = parse_retry_after(retry_after)
+            logger.warning("Secondary rate limit hit on %s %s, retrying in %.0fs", method, url, wait)
+            time.sleep(wait)
+        return response
+    
+    def _get_json(self, url: str, params: Optional[Dict] = None) -> Any:
+        """GET a REST resource, revalidating a previously seen response with If-None-Match."""
+        cache_key = (url, tuple(sorted(params.items())) if params else ())
+        with self._etag_lock:
+            cached = self._etag_cache.get(cache_key)
         
-        merged_prs = 0
-        open_prs = 0
-        closed_prs = 0
-        issues_created = 0
-        assigned_issues = 0
-        comments_count = 0
+        headers = {'If-None-Match': cached[0]} if cached else {}
+        response = self._request('GET', url, self._pick_read_token('core'), params=params, headers=headers)
+        if response.status_code == 304:
+            logger.debug("Not modified, using cached response for %s", url)
+            return cached[1]
+        response.raise_for_status()
+        
+        data = orjson.loads(response.content)
+        etag = response.headers.get('ETag')
+        if etag:
+            with self._etag_lock:
+                self._etag_cache[cache_key] = (etag, data)
+        return data
+    
+    def get_bot_username(self) -> str:
+        """Get the login of the authenticated user (the bot itself), refreshed daily."""
+        if self._bot_login is None or time.monotonic() - self._bot_login_fetched_at > BOT_LOGIN_TTL:
+            self._bot_login = self.github.get_user().login
+            self._bot_login_fetched_at = time.monotonic()
+            logger.info("Bot username: %s", self._bot_login)
+        return self._bot_login
+    
+    def _graphql(self, query: str) -> Dict:
+        """Run a GraphQL query and return its data."""
+        response = self._request('POST', GRAPHQL_URL, self._pick_read_token('graphql'), json={'query': query})
+        response.raise_for_status()
+        result = orjson.loads(response.content)
+        if result.get('errors'):
+            logger.warning("GraphQL query returned errors: %s", result['errors'])
+        if not result.get('data'):
+            raise Exception(f"GraphQL query failed: {result.get('errors')}")
+        return result['data']
+    
+    def _reputation_query_fields(self, alias: str, repo_name: str, username: str) -> str:
+        """Build the aliased search fields that make up one user's reputation."""
+        searches = {
+            'merged': f"repo:{repo_name} author:{username} is:pr is:merged",
+            'open': f"repo:{repo_name} author:{username} is:pr is:open",
+            'closed': f"repo:{repo_name} author:{username} is:pr is:closed is:unmerged",
+            'issues': f"repo:{repo_name} author:{username} is:issue",
+            'assigned': f"repo:{repo_name} is:issue is:open assignee:{username}",
+        }
+        fields = [
+            f"{alias}_{name}: search(query: {orjson.dumps(query).decode()}, type: ISSUE) {{ issueCount }}"
+            for name, query in searches.items()
+        ]
+        # Reactions are only checked on the five most recently updated issues/PRs the user has
+        # commented on (a new comment bumps an item's update time); sorting puts those on the
+        # first (and only) page instead of best-match order
+        commented_query = orjson.dumps(f"repo:{repo_name} commenter:{username} sort:updated-desc").decode()
+        fields.append(
+            f"{alias}_commented: search(query: {commented_query}, type: ISSUE, first: 5) {{ "
+            f"issueCount nodes {{ ... on Issue {{ {REACTION_FIELDS} }} ... on PullRequest {{ {REACTION_FIELDS} }} }} }}"
+        )
+        return "\n".join(fields)
+    
+    def _reputation_from_query_data(self, data: Dict, alias: str, username: str, core_team: FrozenSet[str]) -> Dict:
+        """Assemble one user's reputation dict from the aliased search results."""
         thumbs_up_from_core = 0
         thumbs_down_from_core = 0
+        commented = data[f"{alias}_commented"]
+        for item in commented['nodes']:
+            # Only reactions on the user's own issues/PRs count
+            if not item or (item.get('author') or {}).get('login') != username:
+                continue
+            for reaction in item['thumbsUp']['nodes']:
+                if reaction['user'] and reaction['user']['login'] in core_team:
+                    thumbs_up_from_core += 1
+            for reaction in item['thumbsDown']['nodes']:
+                if reaction['user'] and reaction['user']['login'] in core_team:
+                    thumbs_down_from_core += 1
         
-        # Try GitHub Search API first (faster)
-        logger.info(f"Searching for PRs by @{username} using search API")
-        pr_fetch_success = False
-        try:
-            # Search for all PRs by this user in this repo
-            pr_query = f"repo:{repo_name} author:{username} is:pr"
-            pr_results = self.github.search_issues(query=pr_query)
-            
-            pr_count = 0
-            # Limit to first 100 PRs for performance
-            for pr_data in pr_results[:100]:
-                pr_count += 1
-                pr = repo.get_pull(pr_data.number)
-                if pr.merged:
-                    merged_prs += 1
-                elif pr.state == 'open':
-                    open_prs += 1
-                elif pr.state == 'closed':
-                    closed_prs += 1
-            
-            logger.info(f"Found {pr_count} PRs for @{username}: {merged_prs} merged, {open_prs} open, {closed_prs} closed")
-            pr_fetch_success = True
-        except Exception as e:
-            logger.warning(f"Search API failed for @{username}: {str(e)}")
-            logger.info(f"Falling back to direct PR fetch for @{username}")
-            
-        # Fallback to direct PR fetching if search fails
-        if not pr_fetch_success:
-            try:
-                # Fetch recent PRs and filter by username
-                pr_count = 0
-                checked_prs = 0
-                max_to_check = 300  # Limit to prevent timeout
-                
-                # PyGithub uses automatic pagination
-                prs = repo.get_pulls(state='all')
-                for pr in prs:
-                    checked_prs += 1
-                    if checked_prs > max_to_check:
-                        logger.info(f"Reached PR check limit of {max_to_check}")
-                        break
-                        
-                    if pr.user.login == username:
-                        pr_count += 1
-                        if pr.merged:
-                            merged_prs += 1
-                        elif pr.state == 'open':
-                            open_prs += 1
-                        elif pr.state == 'closed':
-                            closed_prs += 1
-                
-                logger.info(f"Fallback: Checked {checked_prs} PRs, found {pr_count} for @{username}: {merged_prs} merged, {open_prs} open, {closed_prs} closed")
-            except Exception as e:
-                logger.error(f"Fallback PR fetch also failed: {str(e)}")
-                # Leave counts at 0 instead of using fake data
-        
-        # Try GitHub Search API for issues
-        logger.info(f"Searching for issues by @{username} using search API")
-        issue_fetch_success = False
-        try:
-            # Search for issues (not PRs) created by this user
-            issue_query = f"repo:{repo_name} author:{username} is:issue"
-            issue_results = self.github.search_issues(query=issue_query)
-            
-            # Count up to 100 issues
-            issues_created = min(issue_results.totalCount, 100)
-            logger.info(f"Found {issues_created} issues created by @{username}")
-            issue_fetch_success = True
-        except Exception as e:
-            logger.warning(f"Search API failed for issues: {str(e)}")
-            logger.info(f"Falling back to direct issue fetch for @{username}")
-        
-        # Fallback to direct issue fetching if search fails
-        if not issue_fetch_success:
-            try:
-                # Use creator parameter in get_issues
-                issues = repo.get_issues(state='all', creator=username)
-                for issue in issues[:100]:  # Limit to 100 issues
-                    if not issue.pull_request:
-                        issues_created += 1
-                logger.info(f"Fallback: Found {issues_created} issues created by @{username}")
-            except Exception as e:
-                logger.error(f"Fallback issue fetch also failed: {str(e)}")
-                # Leave count at 0
+        return {
+            'merged_prs': data[f"{alias}_merged"]['issueCount'],
+            'open_prs': data[f"{alias}_open"]['issueCount'],
+            'closed_prs': data[f"{alias}_closed"]['issueCount'],
+            'issues': min(data[f"{alias}_issues"]['issueCount'], 100),
+            'assigned_issues': min(data[f"{alias}_assigned"]['issueCount'], 100),
+            'comments': min(commented['issueCount'], 50),
+            'core_thumbs_up': thumbs_up_from_core,
+            'core_thumbs_down': thumbs_down_from_core
+        }
+    
+    def get_users_reputation_bulk(self, repo_name: str, usernames: Iterable[str], core_team: Collection[str]) -> Dict[str, Dict]:
+        """Get reputation data for several users, one GraphQL request per batch of users."""
+        usernames = list(usernames)
+        # Reactions are checked against the core team in a nested loop; make those hash lookups
+        # (a frozenset passed in, as app.py does, is reused as-is)
+        core_team = frozenset(core_team)
+        results = {}
+        for start in range(0, len(usernames), REPUTATION_BATCH_SIZE):
+            results.update(self._get_reputation_batch(repo_name, usernames[start:start + REPUTATION_BATCH_SIZE], core_team))
+        return results
+    
+    def _get_reputation_batch(self, repo_name: str, usernames: List[str], core_team: FrozenSet[str]) -> Dict[str, Dict]:
+        """Get reputation data for a batch of users in a single aliased GraphQL query."""
+        logger.info("Getting reputation for %s users in %s via GraphQL: %s", len(usernames), repo_name, usernames)
         
-        # Try to fetch assigned open issues
-        logger.info(f"Searching for open issues assigned to @{username}")
-        try:
-            # Search for open issues assigned to this user
-            assigned_query = f"repo:{repo_name} is:issue is:open assignee:{username}"
-            assigned_results = self.github.search_issues(query=assigned_query)
-            
-            # Count up to 100 assigned issues
-            assigned_issues = min(assigned_results.totalCount, 100)
-            logger.info(f"Found {assigned_issues} open issues assigned to @{username}")
-        except Exception as e:
-            logger.warning(f"Search API failed for assigned issues: {str(e)}")
-            # Try fallback if search fails
-            try:
-                issues = repo.get_issues(state='open', assignee=username)
-                for issue in issues[:100]:  # Limit to 100 issues
-                    if not issue.pull_request:
-                        assigned_issues += 1
-                logger.info(f"Fallback: Found {assigned_issues} open issues assigned to @{username}")
-            except Exception as e2:
-                logger.error(f"Fallback assigned issues fetch also failed: {str(e2)}")
-                # Leave count at 0
+        aliases = {username: f"u{index}" for index, username in enumerate(usernames)}
+        query = "query {\n" + "\n".join(
+            self._reputation_query_fields(alias, repo_name, username)
+            for username, alias in aliases.items()
+        ) + "\n}"
         
-        # Try to count comments
-        logger.info(f"Counting comments by @{username}")
         try:
-            query = f"repo:{repo_name} commenter:{username}"
-            search_results = self.github.search_issues(query=query)
-            
-            # Just use the count from search results
-            comments_count = min(search_results.totalCount, 50)  # Cap at 50 for performance
-            logger.info(f"Found approximately {comments_count} issues/PRs with comments from @{username}")
-            
-            # For reactions, just check a few recent items
-            logger.info(f"Checking reactions on recent items (limited for performance)")
-            for item in list(search_results)[:5]:  # Only check 5 items
-                try:
-                    issue = repo.get_issue(item.number)
-                    # Check reactions on the issue itself if author matches
-                    if issue.user.login == username:
-                        reactions = issue.get_reactions()
-                        for reaction in reactions:
-                            if reaction.user.login in core_team:
-                                if reaction.content == '+1':
-                                    thumbs_up_from_core += 1
-                                elif reaction.content == '-1':
-                                    thumbs_down_from_core += 1
-                except Exception as e:
-                    logger.warning(f"Error checking reactions on item {item.number}: {str(e)}")
-                    continue
-                    
+            data = self._graphql(query)
         except Exception as e:
-            logger.warning(f"Error searching comments: {str(e)}")
-            # Comments count stays at 0, which is more accurate than fake data
-            logger.info(f"Comments count will remain at 0 for @{username}")
-        
-        # Skip additional reaction checking for performance
-        logger.info(f"Skipping additional reaction checks for performance")
-        
-        result = {
-            'merged_prs': merged_prs,
-            'open_prs': open_prs,
-            'closed_prs': closed_prs,
-            'issues': issues_created,
-            'assigned_issues': assigned_issues,
-            'comments': comments_count,
-            'core_thumbs_up': thumbs_up_from_core,
-            'core_thumbs_down': thumbs_down_from_core
-        }
+            logger.error("Bulk reputation query failed: %s", e)
+            raise
         
-        logger.info(f"Reputation data for @{username}: {result}")
-        return result
+        results = {}
+        for username, alias in aliases.items():
+            # A search that errored comes back as null; zero results is a real count of 0.
+            # Leave the user out rather than report (and cache) zeros for a failed lookup
+            failed = [name for name in REPUTATION_SEARCHES if data.get(f"{alias}_{name}") is None]
+            if failed:
+                logger.warning("Reputation searches %s failed for @%s, skipping", failed, username)
+                continue
+            results[username] = self._reputation_from_query_data(data, alias, username, core_team)
+            logger.info("Reputation data for @%s: %s", username, results[username])
+        return results
+    
+    def get_user_reputation(self, repo_name: str, username: str, core_team: Collection[str]) -> Dict:
+        """Get reputation data for a user in a specific repository."""
+        logger.info("Getting reputation for user @%s in %s", username, repo_name)
+        logger.debug("Core team members: %s", core_team)
+        # One GraphQL request covers every count and the reaction check
+        results = self.get_users_reputation_bulk(repo_name, [username], core_team)
+        if username not in results:
+            raise Exception(f"Reputation lookup failed for @{username}")
+        return results[username]
     
     def get_issue_participants(self, repo_name: str, issue_number: int) -> Set[str]:
         """Get all participants (author + commenters) in an issue."""
-        logger.info(f"Getting participants for issue #{issue_number} in {repo_name}")
+        logger.info("Getting participants for issue #%s in %s", issue_number, repo_name)
         
+        # Conditional fetches: on a repeat webhook for an unchanged issue both come back as a 304
+        issue_url = f"{API_URL}/repos/{repo_name}/issues/{issue_number}"
         try:
-            repo = self.github.get_repo(repo_name)
-            issue = repo.get_issue(issue_number)
+            issue = self._get_json(issue_url)
         except Exception as e:
-            logger.error(f"Failed to get issue #{issue_number}: {str(e)}")
+            logger.error("Failed to get issue #%s: %s", issue_number, e)
             raise
         
-        participants = {issue.user.login}
-        logger.info(f"Issue author: @{issue.user.login}")
+        # Bot accounts are skipped as they're seen rather than filtered out afterwards
+        # (London-Cat is still counted when it authored the issue itself)
+        participants = set()
+        author = issue['user']['login']
+        logger.info("Issue author: @%s", author)
+        if not author.endswith('[bot]'):
+            participants.add(author)
         
         comment_count = 0
-        # Limit to first 30 comments for performance
-        for comment in list(issue.get_comments())[:30]:
-            # Skip bot's own comments (London-Cat is our bot account)
-            if comment.user.login == 'London-Cat':
-                logger.info(f"Skipping comment from London-Cat (our bot)")
+        # Limit to the first page (30 comments) for performance
+        for comment in self._get_json(f"{issue_url}/comments", {'per_page': 30}):
+            login = comment['user']['login']
+            # Skip bot accounts, including our own (London-Cat is our bot account)
+            if login == 'London-Cat' or login.endswith('[bot]'):
                 continue
-            participants.add(comment.user.login)
+            participants.add(login)
             comment_count += 1
             if len(participants) >= 10:  # Limit to 10 participants max
-                logger.info(f"Reached participant limit of 10, stopping")
+                logger.info("Reached participant limit of 10, stopping")
                 break
         
-        logger.info(f"Processed {comment_count} comments")
-        
-        # Filter out bot accounts (but not London-Cat from issue author position)
-        before_filter = len(participants)
-        participants = {p for p in participants if not p.endswith('[bot]')}
-        logger.info(f"Participants after filtering bots: {len(participants)} (filtered {before_filter - len(participants)} bots)")
-        logger.info(f"Participants: {list(participants)}")
+        logger.info("Processed %s comments", comment_count)
+        logger.info("Participants: %s", list(participants))
         
         return participants
     
-    def post_comment(self, repo_name: str, issue_number: int, body: str):
-        """Post a comment to an issue or PR."""
-        logger.info(f"Posting comment to issue #{issue_number} in {repo_name}")
-        logger.debug(f"Comment body length: {len(body)} chars")
+    def post_comment(self, repo_name: str, issue_number: int, body: str) -> int:
+        """Post a comment to an issue or PR and return the new comment's ID."""
+        logger.info("Posting comment to issue #%s in %s", issue_number, repo_name)
+        logger.debug("Comment body length: %s chars", len(body))
         
+        url = f"{API_URL}/repos/{repo_name}/issues/{issue_number}/comments"
         try:
-            repo = self.github.get_repo(repo_name)
-            issue = repo.get_issue(issue_number)
-            comment = issue.create_comment(body)
-            logger.info(f"Comment posted successfully with ID: {comment.id}")
+            response = self._request('POST', url, json={'body': body})
+            response.raise_for_status()
+            comment_id = orjson.loads(response.content)['id']
+            logger.info("Comment posted successfully with ID: %s", comment_id)
+            with self._bot_comment_lock:
+                self._bot_comment_ids[(repo_name, issue_number)] = comment_id
+            return comment_id
         except Exception as e:
-            logger.error(f"Failed to post comment: {str(e)}")
+            logger.error("Failed to post comment: %s", e)
             raise
     
-    def close_pull_request(self, repo_name: str, pr_number: int):
+    def close_pull_request(self, repo_name: str, pr_number: int) -> bool:
         """Close a pull request."""
-        logger.info(f"Attempting to close PR #{pr_number} in {repo_name}")
+        logger.info("Attempting to close PR #%s in %s", pr_number, repo_name)
         
+        # A single PATCH closes the PR; no need to load the repo and PR objects first
+        url = f"{API_URL}/repos/{repo_name}/pulls/{pr_number}"
         try:
-            repo = self.github.get_repo(repo_name)
-            logger.info(f"Got repo: {repo.full_name}")
-            
-            # Get the PR
-            pr = repo.get_pull(pr_number)
-            logger.info(f"Got PR #{pr.number}, current state: {pr.state}, URL: {pr.html_url}")
-            
-            # Close the PR using edit
-            pr.edit(state='closed')
-            logger.info(f"PR #{pr_number} closed successfully")
+            response = self._request('PATCH', url, json={'state': 'closed'})
+            response.raise_for_status()
+            pr = orjson.loads(response.content)
+            logger.info("PR #%s closed successfully, state: %s, URL: %s", pr_number, pr['state'], pr['html_url'])
             return True
         except Exception as e:
-            logger.error(f"Failed to close PR #{pr_number}: {str(e)}")
-            logger.error(f"Error type: {type(e).__name__}")
-            if hasattr(e, 'status'):
-                logger.error(f"Error status: {e.status}")
-            if hasattr(e, 'data'):
-                logger.error(f"Error data: {e.data}")
+            logger.error("Failed to close PR #%s: %s", pr_number, e)
+            logger.error("Error type: %s", type(e).__name__)
+            response = getattr(e, 'response', None)
+            if response is not None:
+                logger.error("Error status: %s", response.status_code)
+                logger.error("Error data: %s", response.text)
             # Don't re-raise to avoid breaking the webhook processing
             # The comment will still be posted even if closing fails
             return False
     
-    def extract_usernames_from_comment(self, comment_body: str) -> Set[str]:
-        """Extract usernames from a bot comment body."""
-        import re
-        usernames = set()
+    def extract_rows_from_comment(self, comment_body: str) -> Dict[str, Dict]:
+        """Extract each user's rendered table row, score and fetch time from a bot comment body."""
+        # Rows with no recorded fetch time (comments from older versions) count as stale
+        fetched_at = {}
+        marker = ROW_FETCHED_AT_PATTERN.search(comment_body)
+        if marker:
+            fetched_at = {name: int(ts) for name, ts in ROW_FETCHED_AT_ENTRY_PATTERN.findall(marker.group(1))}
         
-        # Look for usernames in the table format: | **@username** |
-        pattern = r'\| \*\*@([a-zA-Z0-9][\w-]*)\*\* \|'
-        matches = re.findall(pattern, comment_body)
-        usernames.update(matches)
+        rows = {}
+        for match in SUMMARY_ROW_PATTERN.finditer(comment_body):
+            rows[match.group(1)] = {
+                'username': match.group(1),
+                'score': int(match.group(2)),
+                'row': match.group(0),
+                'fetched_at': fetched_at.get(match.group(1), 0)
+            }
         
-        logger.info(f"Extracted {len(usernames)} usernames from comment: {usernames}")
-        return usernames
+        logger.info("Extracted %s rows from comment: %s", len(rows), list(rows))
+        return rows
+    
+    def _bot_comment_info(self, comment: Dict) -> Dict:
+        """Reduce a REST comment to the fields callers of find_bot_comment use."""
+        return {
+            'id': comment['id'],
+            'body': comment['body'] or ''
+        }
     
     def find_bot_comment(self, repo_name: str, issue_number: int) -> Optional[Dict]:
         """Find an existing bot comment on an issue."""
-        logger.info(f"Searching for existing bot comment on issue #{issue_number}")
+        logger.info("Searching for existing bot comment on issue #%s", issue_number)
+        
+        key = (repo_name, issue_number)
+        with self._bot_comment_lock:
+            comment_id = self._bot_comment_ids.get(key)
+        if comment_id is not None:
+            try:
+                comment = self._get_json(f"{API_URL}/repos/{repo_name}/issues/comments/{comment_id}")
+                logger.info("Found existing bot comment with ID: %s from index", comment_id)
+                return self._bot_comment_info(comment)
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code != 404:
+                    raise
+                # The comment was deleted; forget it and look through the issue instead
+                logger.info("Indexed bot comment %s no longer exists, scanning issue", comment_id)
+                with self._bot_comment_lock:
+                    self._bot_comment_ids.pop(key, None)
         
         try:
-            repo = self.github.get_repo(repo_name)
-            issue = repo.get_issue(issue_number)
-            
-            # Get the authenticated user (the bot itself)
-            bot_user = self.github.get_user()
-            bot_username = bot_user.login
-            logger.info(f"Bot username: {bot_username}")
+            bot_username = self.get_bot_username()
             
-            for comment in issue.get_comments():
-                # Check if comment is from our bot AND contains our signature
-                # Check multiple possible signatures for robustness
-                is_bot_comment = (
-                    comment.user.login == bot_username or
-                    'Generated by Reputation Bot' in comment.body or
-                    'Generated by [Reputation Bot]' in comment.body or
-                    '📊 Reputation Summary' in comment.body
-                )
+            url = f"{API_URL}/repos/{repo_name}/issues/{issue_number}/comments"
+            page = 1
+            while True:
+                # Conditional page fetches: unchanged pages come back as a 304
+                comments = self._get_json(url, {'per_page': 100, 'page': page})
+                for comment in comments:
+                    login = comment['user']['login']
+                    body = comment['body'] or ''
+                    # Check if comment is from our bot or carries one of our signatures
+                    if login == bot_username or BOT_SIGNATURE_PATTERN.search(body):
+                        logger.info("Found existing bot comment with ID: %s from user: %s", comment['id'], login)
+                        with self._bot_comment_lock:
+                            self._bot_comment_ids[key] = comment['id']
+                        return self._bot_comment_info(comment)
                 
-                if is_bot_comment:
-                    logger.info(f"Found existing bot comment with ID: {comment.id} from user: {comment.user.login}")
-                    return {
-                        'id': comment.id,
-                        'body': comment.body
-                    }
+                if len(comments) < 100:
+                    break
+                page += 1
             
-            logger.info(f"No existing bot comment found (checked comments from users)")
+            logger.info("No existing bot comment found (checked comments from users)")
             return None
         except Exception as e:
-            logger.error(f"Error searching for bot comment: {str(e)}")
+            logger.error("Error searching for bot comment: %s", e)
             raise
     
     def update_comment(self, repo_name: str, comment_id: int, body: str):
         """Update an existing comment."""
-        logger.info(f"Updating comment {comment_id} in {repo_name}")
-        logger.debug(f"New comment body length: {len(body)} chars")
+        logger.info("Updating comment %s in %s", comment_id, repo_name)
+        logger.debug("New comment body length: %s chars", len(body))
         
-        url = f"https://api.github.com/repos/{repo_name}/issues/comments/{comment_id}"
+        url = f"{API_URL}/repos/{repo_name}/issues/comments/{comment_id}"
         try:
-            response = requests.patch(url, headers=self.headers, json={'body': body})
+            response = self._request('PATCH', url, json={'body': body})
             response.raise_for_status()
-            logger.info(f"Comment {comment_id} updated successfully")
+            logger.info("Comment %s updated successfully", comment_id)
         except Exception as e:
-            logger.error(f"Failed to update comment: {str(e)}")
+            logger.error("Failed to update comment: %s", e)
             raise
\ No newline at end of file
@@ -1,22 +1,27 @@
 from typing import Dict
 
+# Points per item of activity (comments are displayed but don't add to the score)
+MERGED_PR_POINTS = 20
+OPEN_PR_POINTS = 3
+CLOSED_PR_POINTS = -10
+ISSUE_POINTS = 5
+CORE_THUMBS_UP_POINTS = 15
+CORE_THUMBS_DOWN_POINTS = -50
+
+# Score weight of each activity count
+REPUTATION_WEIGHTS = (
+    ('merged_prs', MERGED_PR_POINTS),
+    ('open_prs', OPEN_PR_POINTS),
+    ('closed_prs', CLOSED_PR_POINTS),
+    ('issues', ISSUE_POINTS),
+    ('core_thumbs_up', CORE_THUMBS_UP_POINTS),
+    ('core_thumbs_down', CORE_THUMBS_DOWN_POINTS),
+)
+
 def calculate_reputation(data: Dict) -> int:
     """Calculate reputation score based on GitHub activity."""
-    score = 0
-    
-    # PRs scoring
-    score += data['merged_prs'] * 20
-    score += data['open_prs'] * 3
-    score -= data['closed_prs'] * 10
-    
-    # Issues (comments don't add to score, just displayed)
-    score += data['issues'] * 5
-    
-    # Core team reactions
-    score += data['core_thumbs_up'] * 15
-    score -= data['core_thumbs_down'] * 50
-    
-    return score  # Allow negative scores
+    # Weighted sum of the activity counts; negative scores are allowed
+    return sum(data[key] * points for key, points in REPUTATION_WEIGHTS)
 
 def format_reputation_line(score: int, data: Dict) -> str:
     """Format the reputation data into a compact single line."""
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Unit tests for GithubClient's request handling, run against a fake HTTP session.
+Run with: python -m unittest test_github_client
+"""
+
+import unittest
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest import mock
+
+import github_client
+from github_client import GithubClient, MAX_RETRY_AFTER
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = b'{}'
+
+class FakeSession:
+    """Returns the queued responses in order and records each request."""
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url))
+        return self.responses.pop(0)
+
+class RetryAfterTest(unittest.TestCase):
+    def setUp(self):
+        # Skip the bot login lookup the constructor does over the network
+        with mock.patch.object(GithubClient, 'get_bot_username'):
+            self.client = GithubClient('test-token')
+        sleep_patch = mock.patch.object(github_client.time, 'sleep')
+        self.sleep = sleep_patch.start()
+        self.addCleanup(sleep_patch.stop)
+
+    def request_with_retry_after(self, retry_after, status_code=403):
+        self.client.session = FakeSession([
+            FakeResponse(status_code, {'Retry-After': retry_after}),
+            FakeResponse(200),
+        ])
+        response = self.client._request('GET', 'https://api.github.com/test')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.client.session.requests), 2)
+        self.sleep.assert_called_once()
+        return self.sleep.call_args[0][0]
+
+    def test_delta_seconds(self):
+        self.assertEqual(self.request_with_retry_after('5', status_code=429), 5)
+
+    def test_delta_seconds_capped(self):
+        self.assertEqual(self.request_with_retry_after('3600'), MAX_RETRY_AFTER)
+
+    def test_http_date(self):
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        wait = self.request_with_retry_after(format_datetime(retry_at, usegmt=True))
+        self.assertGreater(wait, 25)
+        self.assertLessEqual(wait, 30)
+
+    def test_http_date_in_the_past(self):
+        retry_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+        self.assertEqual(self.request_with_retry_after(format_datetime(retry_at, usegmt=True)), 0)
+
+    def test_unparseable_value(self):
+        self.assertEqual(self.request_with_retry_after('soon'), MAX_RETRY_AFTER)
+
+if __name__ == '__main__':
+    unittest.main()
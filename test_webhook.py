@@ -5,22 +5,19 @@ Run this after starting your Docker container.
 """
 
 import requests
-import json
+import orjson
 import hmac
-import hashlib
 import sys
 
 # Configuration
 WEBHOOK_URL = "http://localhost:8080/webhook"
 WEBHOOK_SECRET = "test-secret-123"  # Must match your container's env var
+WEBHOOK_SECRET_BYTES = WEBHOOK_SECRET.encode()
 
-def create_signature(payload_bytes, secret):
+def create_signature(payload_bytes, secret_bytes):
     """Create GitHub webhook signature"""
-    signature = hmac.new(
-        secret.encode(),
-        payload_bytes,
-        hashlib.sha256
-    ).hexdigest()
+    # hmac.digest is the one-shot OpenSSL path, same as the server's verifier
+    signature = hmac.digest(secret_bytes, payload_bytes, 'sha256').hex()
     return f"sha256={signature}"
 
 def send_issue_comment_event(issue_number=1849):
@@ -43,8 +40,8 @@ def send_issue_comment_event(issue_number=1849):
         }
     }
     
-    payload_bytes = json.dumps(payload).encode()
-    signature = create_signature(payload_bytes, WEBHOOK_SECRET)
+    payload_bytes = orjson.dumps(payload)
+    signature = create_signature(payload_bytes, WEBHOOK_SECRET_BYTES)
     
     headers = {
         "Content-Type": "application/json",
@@ -56,8 +53,8 @@ def send_issue_comment_event(issue_number=1849):
     try:
         response = requests.post(WEBHOOK_URL, data=payload_bytes, headers=headers)
         print(f"Response: {response.status_code} - {response.text}")
-        if response.status_code == 200:
-            print("✅ Webhook processed successfully!")
+        if response.status_code == 202:
+            print("✅ Webhook accepted, processing continues in the background")
             print("\nCheck container logs: docker logs reputation-bot-test --tail 50")
         else:
             print("❌ Webhook processing failed")
@@ -80,8 +77,8 @@ def send_pr_event(pr_number=100):
         }
     }
     
-    payload_bytes = json.dumps(payload).encode()
-    signature = create_signature(payload_bytes, WEBHOOK_SECRET)
+    payload_bytes = orjson.dumps(payload)
+    signature = create_signature(payload_bytes, WEBHOOK_SECRET_BYTES)
     
     headers = {
         "Content-Type": "application/json",